@@ -1,13 +1,11 @@
 import streamlit as st
+import altair as alt
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 import json
-import matplotlib.pyplot as plt
-import seaborn as sns
-
-# Türkçe karakter desteği ve figür kapatma ayarları
-plt.rcParams['font.family'] = 'Arial'
-plt.rcParams['axes.unicode_minus'] = False
+import os
+import tempfile
 
 # Streamlit uygulamanızın sayfa ayarları
 st.set_page_config(layout="wide", page_title="AWS Maliyet Optimizasyon Aracı")
@@ -16,13 +14,20 @@ st.title("💰 AWS Maliyet Optimizasyon Aracı")
 st.write("Bu uygulama, AWS maliyet verilerini analiz eder ve potansiyel optimizasyon alanlarını belirler.")
 st.write("⚠️ **ÖNEMLİ:** Bu sürüm sadece 'mock_aws_costs.json' dosyasındaki simüle edilmiş veriyi kullanır, gerçek AWS verisi çekmez.")
 
+MOCK_DATA_FILE = 'mock_aws_costs.json'
+# İşlenmiş verinin Parquet kopyası; JSON değişmediği sürece sunucu yeniden başlasa bile buradan okunur
+MOCK_DATA_CACHE_FILE = 'mock_aws_costs.parquet'
+
+# Cost Explorer verisi günde bir kez güncellenir; aynı veriyi her yeniden çalıştırmada tekrar okumaya gerek yok
+COST_DATA_TTL = timedelta(hours=24)
+
 # --- get_cost_and_usage_data fonksiyonu (Şimdi sadece mock veri döndürecek) ---
 def get_mock_cost_data():
     """
     Loads mock cost data from 'mock_aws_costs.json'.
     """
     try:
-        with open('mock_aws_costs.json', 'r') as f:
+        with open(MOCK_DATA_FILE, 'r') as f:
             data = json.load(f)
         return data
     except FileNotFoundError:
@@ -32,6 +37,110 @@ def get_mock_cost_data():
         st.error(f"Mock veri okunurken bir hata oluştu: {e}")
         st.stop()
 
+def build_cost_dataframe(records):
+    """
+    Builds the cost DataFrame column by column from a list of cost records.
+    Missing fields become NaN, as with pd.DataFrame on a list of dicts.
+    """
+    dates, services, costs, units = [], [], [], []
+    for record in records:
+        dates.append(record.get('Date'))
+        services.append(record.get('Service'))
+        costs.append(record.get('Cost'))
+        units.append(record.get('Unit'))
+    # Servis ve birim sütunları az sayıda farklı değer içerir; kategori olarak saklanır.
+    # Maliyetler sent hassasiyetinde olduğu için float32 yeterlidir.
+    return pd.DataFrame({'Date': dates,
+                         'Service': pd.Categorical(services),
+                         'Cost': pd.Series(costs, dtype='float32'),
+                         'Unit': pd.Categorical(units)})
+
+def get_mock_data_mtime():
+    """
+    Returns the modification time of the mock data file, or None if it is missing.
+    """
+    try:
+        return os.path.getmtime(MOCK_DATA_FILE)
+    except OSError:
+        return None
+
+def write_parquet_cache(df):
+    """
+    Writes df to the Parquet sidecar atomically: it is written to a temporary file in
+    the same directory and then moved into place, so readers never see a partial file.
+    """
+    cache_dir = os.path.dirname(os.path.abspath(MOCK_DATA_CACHE_FILE))
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix='mock_aws_costs.', suffix='.parquet.tmp')
+    except OSError:
+        # Klasör yazılabilir değilse önbellek olmadan devam edilir
+        return
+    os.close(fd)
+    try:
+        df.to_parquet(tmp_path)
+        os.replace(tmp_path, MOCK_DATA_CACHE_FILE)
+    except (OSError, ValueError):
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+@st.cache_data(ttl=COST_DATA_TTL)
+def load_cost_dataframe(data_mtime):
+    """
+    Loads the mock cost data and returns (df, cost_unit), where cost_unit is the single
+    currency unit shared by all rows and is dropped from the DataFrame.
+    data_mtime is the cache key, so editing the file invalidates the cache. A Parquet
+    sidecar newer than the JSON file is read instead of re-parsing the JSON.
+    """
+    df = None
+    try:
+        if data_mtime is not None and os.path.getmtime(MOCK_DATA_CACHE_FILE) >= data_mtime:
+            df = pd.read_parquet(MOCK_DATA_CACHE_FILE)
+    except (OSError, ValueError):
+        # Eksik ya da bozuk Parquet kopyası yok sayılır; veri JSON'dan yeniden okunur
+        df = None
+
+    if df is None:
+        df = build_cost_dataframe(get_mock_cost_data())
+        # Tarihler her zaman ISO biçiminde (YYYY-MM-DD) gelir; biçimi vermek tahmin eden ayrıştırıcıyı atlar
+        df['Date'] = pd.to_datetime(df['Date'], format='%Y-%m-%d', cache=True)
+        write_parquet_cache(df)
+
+    # Cost Explorer tüm satırlar için aynı birimi (USD) döndürür; sütun yerine tek bir değer olarak tutulur
+    units = df['Unit'].dropna().unique()
+    if len(units) > 1:
+        st.error(f"Hata: Maliyet verisinde birden fazla para birimi var ({', '.join(map(str, units))}).")
+        st.stop()
+    cost_unit = str(units[0]) if len(units) else None
+    return df.drop(columns='Unit'), cost_unit
+
+@st.cache_data
+def aggregate_costs(df):
+    """
+    Computes the per-day-per-service, daily and per-service cost totals.
+    Returns the three results as a tuple, cached so widget reruns skip the groupby.
+    """
+    # Tarih+servis bazında tek bir gruplama; diğer toplamlar bu küçük sonuçtan türetilir.
+    # float32 yalnızca saklama içindir; toplamlar float64 ile hesaplanır. Ara toplamlar yuvarlanmaz,
+    # aksi halde sentin altındaki günlük tutarlar kaybolur; yalnızca nihai toplamlar sente yuvarlanır
+    day_service_cost = df['Cost'].astype('float64').groupby([df['Date'], df['Service']], sort=False, observed=True).sum()
+    # Günlük toplam: tarihe göre sıralayıp ardışık blokları np.add.reduceat ile topluyoruz
+    dates = day_service_cost.index.get_level_values('Date').to_numpy()
+    if len(dates) == 0:
+        # Tüm satırların servisi boşsa gruplama sonucu boştur; reduceat boş girdiyle çalışmaz
+        daily_total_cost = pd.DataFrame({'Date': dates, 'Cost': day_service_cost.to_numpy()})
+    else:
+        order = np.argsort(dates, kind='stable')
+        dates_sorted = dates[order]
+        costs_sorted = day_service_cost.to_numpy()[order]
+        starts = np.concatenate(([0], 1 + np.flatnonzero(dates_sorted[1:] != dates_sorted[:-1])))
+        daily_total_cost = pd.DataFrame({'Date': dates_sorted[starts],
+                                         'Cost': np.add.reduceat(costs_sorted, starts).round(2)})
+    service_total_cost = day_service_cost.groupby(level='Service', observed=True).sum().round(2).reset_index()
+    service_total_cost = service_total_cost.sort_values(by='Cost', ascending=False)
+    return day_service_cost, daily_total_cost, service_total_cost
+
 # --- Main Workflow ---
 
 # Tarih aralığı seçicileri (sidebar'da) - Bu kısım sadece görsel amaçlı kalacak
@@ -44,12 +153,8 @@ start_date_input = st.sidebar.date_input("Başlangıç Tarihi", default_start_da
 end_date_input = st.sidebar.date_input("Bitiş Tarihi", default_end_date)
 
 
-# Simüle edilmiş veriyi çek
-aws_costs = get_mock_cost_data()
-
-# Veriyi Pandas DataFrame'e dönüştür
-df = pd.DataFrame(aws_costs)
-df['Date'] = pd.to_datetime(df['Date'])
+# Simüle edilmiş veriyi çek ve Pandas DataFrame'e dönüştür
+df, cost_unit = load_cost_dataframe(get_mock_data_mtime())
 
 if not df.empty:
     st.subheader("AWS Maliyet Verisi Örneği (İlk 5 Satır)")
@@ -58,58 +163,59 @@ if not df.empty:
     # --- Veri İşleme ve Analiz ---
     st.header("Maliyet Analizleri")
 
+    day_service_cost, daily_total_cost, service_total_cost = aggregate_costs(df)
+
     # a) Günlük toplam maliyetler
-    daily_total_cost = df.groupby('Date')['Cost'].sum().reset_index()
     st.subheader("Günlük Toplam Maliyetler")
     st.dataframe(daily_total_cost)
 
     # b) Servis bazında toplam maliyetler
-    service_total_cost = df.groupby('Service')['Cost'].sum().reset_index()
-    service_total_cost = service_total_cost.sort_values(by='Cost', ascending=False)
     st.subheader("Servis Bazında Toplam Maliyetler")
     st.dataframe(service_total_cost)
 
     # --- Temel Optimizasyon Önerisi Mantığı ---
     st.header("Optimizasyon Önerileri")
 
-    df['DayServiceCost'] = df.groupby(['Date', 'Service'])['Cost'].transform('sum')
     # Öneri eşiğini düşürdük, daha fazla öneri görmek için
-    high_cost_per_service_per_day = df[df['DayServiceCost'] > 1].drop_duplicates(subset=['Date', 'Service'])
+    # Eşik, satırlar yerine zaten gruplanmış tarih+servis toplamlarına uygulanır
+    high_cost_idx = np.flatnonzero(day_service_cost.to_numpy() > 1)
+    high_cost_pairs = day_service_cost.index[high_cost_idx]
+    high_costs = day_service_cost.to_numpy()[high_cost_idx]
 
-    if not high_cost_per_service_per_day.empty:
+    if len(high_cost_idx) > 0:
         st.warning("**Optimizasyon Önerileri:**")
-        for index, row in high_cost_per_service_per_day.iterrows():
-            st.write(f"- **{row['Date'].strftime('%Y-%m-%d')}** tarihinde, **'{row['Service']}'** hizmetinin maliyeti **{row['Cost']:.2f} {row['Unit']}** oldu. Kullanımını gözden geçirmeyi düşünün!")
+        # Tarihler ve tutarlar satır satır değil, tek seferde biçimlendirilir; liste tek bir çağrıyla yazılır
+        dates_str = high_cost_pairs.get_level_values('Date').strftime('%Y-%m-%d')
+        costs_str = np.char.mod('%.2f', high_costs.astype(np.float64))
+        lines = [f"- **{date}** tarihinde, **'{service}'** hizmetinin maliyeti **{cost} {cost_unit}** oldu. Kullanımını gözden geçirmeyi düşünün!"
+                 for date, service, cost in zip(dates_str, high_cost_pairs.get_level_values('Service'), costs_str)]
+        st.markdown("\n".join(lines))
     else:
         st.info("Maliyetler kontrol altında görünüyor; şu anda belirgin bir optimizasyon önerisi yok (simüle edilmiş veri için).")
 
     # --- Veri Görselleştirme ---
     st.header("Maliyet Görselleştirmeleri")
 
-    # Günlük Maliyet Trendi Plotu
+    # Grafikler tarayıcıda (Vega-Lite) çizilir; sunucu tarafında görüntü oluşturulmaz
+    # Günlük Maliyet Trendi Grafiği
     st.subheader("Günlük Toplam AWS Maliyet Eğilimi")
-    plt.figure(figsize=(12, 6))
-    sns.lineplot(x='Date', y='Cost', data=daily_total_cost, marker='o', color='skyblue')
-    plt.title('Daily Total AWS Cost Trend', fontsize=16)
-    plt.xlabel('Date', fontsize=12)
-    plt.ylabel('Cost (USD)', fontsize=12)
-    plt.grid(True)
-    plt.xticks(rotation=45, ha='right')
-    plt.tight_layout()
-    st.pyplot(plt)
-    plt.clf()
-
-    # Servis Bazında Maliyet Dağılımı Plotu
+    daily_chart = alt.Chart(daily_total_cost, title='Daily Total AWS Cost Trend').mark_line(point=True, color='skyblue').encode(
+        x=alt.X('Date:T', title='Date'),
+        y=alt.Y('Cost:Q', title=f'Cost ({cost_unit})'),
+        tooltip=[alt.Tooltip('Date:T'), alt.Tooltip('Cost:Q', format='.2f')],
+    )
+    st.altair_chart(daily_chart, use_container_width=True)
+
+    # Servis Bazında Maliyet Dağılımı Grafiği
     st.subheader("Servis Bazında AWS Maliyet Dağılımı")
-    plt.figure(figsize=(12, 7))
-    sns.barplot(x='Service', y='Cost', data=service_total_cost.sort_values(by='Cost', ascending=False), palette='viridis')
-    plt.title('AWS Cost Distribution by Service', fontsize=16)
-    plt.xlabel('AWS Service', fontsize=12)
-    plt.ylabel('Total Cost (USD)', fontsize=12)
-    plt.xticks(rotation=60, ha='right')
-    plt.tight_layout()
-    st.pyplot(plt)
-    plt.clf()
+    # Çubuklar maliyete göre büyükten küçüğe sıralanır (Vega-Lite varsayılanı alfabetik sıradır)
+    service_chart = alt.Chart(service_total_cost, title='AWS Cost Distribution by Service').mark_bar().encode(
+        x=alt.X('Service:N', sort='-y', title='AWS Service', axis=alt.Axis(labelAngle=-60)),
+        y=alt.Y('Cost:Q', title=f'Total Cost ({cost_unit})'),
+        color=alt.Color('Service:N', scale=alt.Scale(scheme='viridis'), legend=None),
+        tooltip=[alt.Tooltip('Service:N'), alt.Tooltip('Cost:Q', format='.2f')],
+    )
+    st.altair_chart(service_chart, use_container_width=True)
 
 else:
     st.error("Analiz edilecek veri bulunamadı. Lütfen 'mock_aws_costs.json' dosyasının doğru olduğundan emin olun.")